@@ -1,7 +1,10 @@
 from contextlib import contextmanager
 from pathlib import Path
+from typing import TextIO
+from collections.abc import Iterable
 
 import sys
+import os
 
 sys.path.append(str(Path(__file__).parent.parent.parent))
 
@@ -12,27 +15,48 @@ import shutil
 
 class CPPGenerator:
     def __init__(self):
-        self.__code = ""
+        self.__code: list[str] = []
+        self.__size = 0
+        self.__lines: set[str] = set()
         self.__indents = 0
         self.__doc = False
+        self.__file: TextIO | None = None
+        self.__buffer_size = 0
 
     def __call__(self, line: str, /, *, indent: int | None = None, unique_line: bool = False) -> None:
-        if unique_line and line in self.__code:
-            return
+        # Only unique lines are remembered, so memory does not grow with the rest of the emitted code
+        if unique_line:
+            if line in self.__lines:
+                return
+            self.__lines.add(line)
 
         tabs = " " * (self.__indents if indent is None else indent)
         pfix = " * " if self.__doc else ""
-        self.__code += f"{tabs}{pfix}{line}\n"
+        self.__append(f"{tabs}{pfix}{line}\n")
+
+    # Writes several unique lines in a single append, skipping those already emitted as unique
+    def unique_block(self, lines: Iterable[str], /) -> None:
+        lines = [line for line in dict.fromkeys(lines) if line not in self.__lines]
+        self.__lines.update(lines)
+        self.__append("".join(f"{line}\n" for line in lines))
 
     @property
     def code(self) -> str:
-        return self.__code
+        return "".join(self.__code)
 
     def disclaimer(self, ffile: str, /) -> None:
-        self(f"// Generated by Convoy's code generation script: '{ffile}'", unique_line=True)
+        self(CPPGenerator.disclaimer_line(ffile), unique_line=True)
 
     def include(self, header: str, /, *, quotes: bool = False) -> None:
-        self(f'#include "{header}"' if quotes else f"#include <{header}>", unique_line=True)
+        self(CPPGenerator.include_line(header, quotes=quotes), unique_line=True)
+
+    @staticmethod
+    def disclaimer_line(ffile: str, /) -> str:
+        return f"// Generated by Convoy's code generation script: '{ffile}'"
+
+    @staticmethod
+    def include_line(header: str, /, *, quotes: bool = False) -> str:
+        return f'#include "{header}"' if quotes else f"#include <{header}>"
 
     def comment(self, msg: str, /) -> None:
         msgs = msg.split("\n")
@@ -93,14 +117,65 @@ class CPPGenerator:
             if delimiters and closer:
                 self(closer)
 
-    def write(self, path: Path, /) -> None:
+    @contextmanager
+    def open(self, path: Path, /, *, buffer_size: int = 4096):
         path.parent.mkdir(parents=True, exist_ok=True)
-        with path.open("w") as file:
-            file.write(self.__code)
+        self.__code.clear()
+        self.__size = 0
+        self.__lines.clear()
+        staging = CPPGenerator.__staging_path(path)
+        try:
+            with staging.open("w") as file:
+                self.__file = file
+                self.__buffer_size = buffer_size
+                try:
+                    yield
+                    self.__flush()
+                finally:
+                    self.__file = None
+        except BaseException:
+            staging.unlink(missing_ok=True)
+            raise
+
+        self.__publish(staging, path)
 
+    def write(self, path: Path, /) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        staging = CPPGenerator.__staging_path(path)
+        staging.write_text(self.code)
+        self.__publish(staging, path)
+
+    def __append(self, code: str, /) -> None:
+        self.__code.append(code)
+        self.__size += len(code)
+        if self.__file is not None and self.__size >= self.__buffer_size:
+            self.__flush()
+
+    def __flush(self) -> None:
+        if self.__file is None:
+            Convoy.exit_error("Cannot flush generated code when no file is open.")
+        self.__file.write("".join(self.__code))
+        self.__code.clear()
+        self.__size = 0
+
+    @staticmethod
+    def __staging_path(path: Path, /) -> Path:
+        return path.with_name(f".{path.stem}.convoy{path.suffix}")
+
+    # The file is formatted before being compared so that regenerating identical code leaves the output untouched
+    def __publish(self, staging: Path, path: Path, /) -> None:
         Convoy.log(
             f"Exported generated code to <underline>{path.resolve()}</underline>. Attempting to format with <bold>clang-format</bold>."
         )
+        self.__format(staging)
+        if path.is_file() and path.read_bytes() == staging.read_bytes():
+            staging.unlink()
+            Convoy.verbose(f"The generated code at <underline>{path.resolve()}</underline> is unchanged.")
+            return
+
+        os.replace(staging, path)
+
+    def __format(self, path: Path, /) -> None:
         cfpath = shutil.which("clang-format")
         if cfpath is None:
             Convoy.warning("<bold>clang-format</bold> was not found.")
@@ -3,16 +3,40 @@ from argparse import ArgumentParser, Namespace
 from generator import CPPGenerator
 from parser import CPParser, ClassCollection, ControlMacros, Class, Enum
 from collections.abc import Callable
+from collections import defaultdict
+from itertools import groupby
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 
 import sys
+import os
+import re
+import hashlib
+import pickle
+import multiprocessing
+import mmap
 
 sys.path.append(str(Path(__file__).parent.parent.parent))
 
 from convoy import Convoy
 
 
-class CPPOrchestrator:
+_FORBIDDEN_CHARS = re.compile(r'[<>:"/\\|?*]')
+
+
+def _emit(
+    out: Path,
+    classes: ClassCollection,
+    gen: CPPGenerator,
+    generator: Callable[[CPPGenerator, ClassCollection], None],
+    prefix: tuple[str, ...],
+    /,
+) -> None:
+    with gen.open(out):
+        gen.unique_block(prefix)
+        generator(gen, classes)
+
 
+class CPPOrchestrator:
     def __init__(
         self,
         rinputs: str | Path | list[str | Path],
@@ -22,10 +46,13 @@ class CPPOrchestrator:
         macros: ControlMacros,
         recursive: bool = False,
         file_per_class: bool = False,
+        cache_dir: Path | None = None,
+        jobs: int = 1,
         **parse_kwargs,
     ) -> None:
 
         self.__file_per_class = file_per_class
+        self.__jobs = jobs
         inputs = Convoy.resolve_paths(
             rinputs, recursive=recursive, check_exists=True, require_files=True, remove_duplicates=True
         )
@@ -39,32 +66,50 @@ class CPPOrchestrator:
         log_paths("input", inputs)
         log_paths("output", outputs)
 
-        parser = CPPOrchestrator.__create_parser(inputs, macros=macros)
-        parser.remove_comments()
+        code, digests = CPPOrchestrator.__read_inputs(inputs, macros=macros)
 
-        classes = parser.parse(*parse_args, **parse_kwargs)
+        cache = None
+        if cache_dir is not None and code:
+            key = CPPOrchestrator.__cache_key(digests, macros, parse_args, parse_kwargs)
+            cache = cache_dir / f"{key}.pkl"
 
-        self.__outputs = self.__validate_and_resolve_outputs(inputs, outputs, classes)
-        self.__generators = self.__create_generators()
+        classes = CPPOrchestrator.__load_cache(cache) if cache is not None else None
+        if not code:
+            Convoy.log(
+                f"None of the inputs contain the <bold>{macros.declare}</bold> or <bold>{macros.enum}</bold> macros. Skipping parsing."
+            )
+            classes = ClassCollection()
+        elif classes is None:
+            parser = CPParser(code, macros=macros, cache_dir=cache_dir)
+            parser.remove_comments()
+
+            classes = parser.parse(*parse_args, **parse_kwargs)
+            if cache is not None:
+                CPPOrchestrator.__store_cache(cache, classes)
+
+        resolved = self.__validate_and_resolve_outputs(inputs, outputs, classes)
+        self.__outputs = [
+            (out, classes, CPPGenerator(), CPPOrchestrator.__create_prefix(classes))
+            for out, classes in resolved.items()
+            if classes.classes or classes.enums
+        ]
 
     def generate(
         self, generator: Callable[[CPPGenerator, ClassCollection], None], /, *, disclaimer: str | None = None
     ) -> None:
-        for out, classes in self.__outputs.items():
-            if not classes.classes and not classes.enums:
-                continue
-            gen = self.__generators[out]
-
-            if disclaimer is not None:
-                gen.disclaimer(disclaimer)
-            gen("#pragma once")
-
-            for c in classes.classes:
-                gen.include(str(c.file), quotes=True)
-
-            generator(gen, classes)
-
-            gen.write(out)
+        header = (CPPGenerator.disclaimer_line(disclaimer),) if disclaimer is not None else ()
+        jobs = [(out, classes, gen, generator, header + prefix) for out, classes, gen, prefix in self.__outputs]
+        if self.__jobs <= 1 or len(jobs) <= 1 or not CPPOrchestrator.__can_emit_in_parallel(generator):
+            for job in jobs:
+                _emit(*job)
+            return
+
+        Convoy.verbose(f"Generating {len(jobs)} outputs in parallel.")
+        with ProcessPoolExecutor(
+            max_workers=min(self.__jobs, len(jobs)), mp_context=multiprocessing.get_context("fork")
+        ) as executor:
+            for _ in executor.map(_emit, *zip(*jobs)):
+                pass
 
     @classmethod
     def from_cli_arguments(cls, args: Namespace, /, *parser_args, macros: ControlMacros, **parser_kwargs):
@@ -75,6 +120,8 @@ class CPPOrchestrator:
             macros=macros,
             recursive=args.recursive,
             file_per_class=args.file_per_class,
+            cache_dir=args.cache_dir,
+            jobs=args.jobs,
             resolve_hierarchies_with_inheritance=args.use_inheritance_list,
             **parser_kwargs,
         )
@@ -111,6 +158,18 @@ class CPPOrchestrator:
             default=False,
             help="Whether to generate a file per parsed class or struct. If selected, the output must be a single folder.",
         )
+        parser.add_argument(
+            "--cache-dir",
+            type=Path,
+            default=None,
+            help="A folder where parsed classes will be cached, keyed by a hash of the input files contents and the parser configuration. If the inputs did not change since the last run, parsing is skipped entirely and the warnings the parser reported when the cache was created are not repeated. Caching is disabled if not specified.",
+        )
+        parser.add_argument(
+            "--jobs",
+            type=int,
+            default=1,
+            help="The number of processes used to generate the outputs. Parallel generation is only available on Linux, where workers can be forked, and their logs may interleave. Defaults to 1.",
+        )
         parser.add_argument(
             "--use-inheritance-list",
             action="store_true",
@@ -126,8 +185,23 @@ class CPPOrchestrator:
                 help="Print more information.",
             )
 
-    def __create_generators(self) -> dict[Path, CPPGenerator]:
-        return {out: CPPGenerator() for out in self.__outputs}
+    @classmethod
+    def __create_prefix(cls, classes: ClassCollection, /) -> tuple[str, ...]:
+        includes = dict.fromkeys(CPPGenerator.include_line(str(c.file), quotes=True) for c in classes.classes)
+        return ("#pragma once", *includes)
+
+    @classmethod
+    def __can_emit_in_parallel(cls, generator: Callable[[CPPGenerator, ClassCollection], None], /) -> bool:
+        # Spawned workers would re-import the calling script, and forking is only safe on Linux
+        if not Convoy.is_linux:
+            Convoy.verbose("Parallel generation is only available on Linux. Outputs will be generated serially.")
+            return False
+        try:
+            pickle.dumps(generator)
+        except Exception:
+            Convoy.verbose("The generator callable cannot be pickled. Outputs will be generated serially.")
+            return False
+        return True
 
     def __validate_and_resolve_outputs(
         self, inputs: list[Path], outputs: list[Path], classes: ClassCollection, /
@@ -135,48 +209,19 @@ class CPPOrchestrator:
         if not inputs or not outputs:
             Convoy.exit_error("Must at least provide an input and an output.")
 
-        if len(outputs) == 1 and outputs[0].is_dir():
-            odir = outputs[0]
-            if self.__file_per_class:
-                return CPPOrchestrator.__resolve_outputs_with_classes(classes, odir)
-
-            return CPPOrchestrator.__resolve_outputs_with_inputs(classes, odir)
-
-        if self.__file_per_class:
-            Convoy.exit_error(
-                "If the option <bold>--file-per-class</bold> is selected, the output must be a single directory"
-            )
-
-        if len(outputs) != 1:
-            if len(inputs) != len(outputs):
-                Convoy.exit_error("If multiple output paths are provided, they must match the amount of input files.")
-
-            inp_to_out = {inp: out for inp, out in zip(inputs, outputs)}
-            result: dict[Path, ClassCollection] = {}
-
-            def resolve(objs: list[Class] | list[Enum], /) -> None:
-                for obj in objs:
-                    if obj.file is None:
-                        Convoy.exit_error(f"The class <bold>{obj.id.identifier}</bold> has no file attribute.")
-                    out = inp_to_out[obj.file]
-                    result.setdefault(out, ClassCollection()).add(obj)
-
-            resolve(classes.classes)
-            resolve(classes.enums)
-
-            return result
-
-        return {outputs[0]: classes}
+        single_dir = len(outputs) == 1 and outputs[0].is_dir()
+        mode = (single_dir, self.__file_per_class, len(outputs) != 1)
+        return CPPOrchestrator.__OUTPUT_RESOLVERS[mode](inputs, outputs, classes)
 
-    @classmethod
+    @staticmethod
     def __resolve_outputs_with_classes(
-        cls, classes: ClassCollection, directory: Path, /
+        inputs: list[Path], outputs: list[Path], classes: ClassCollection, /
     ) -> dict[Path, ClassCollection]:
-        outputs = {}
-        forbidden = r"<>:\"/\|?*"
+        directory = outputs[0]
+        result = {}
 
         def check(name: str, /) -> str:
-            if any(f in name for f in forbidden):
+            if _FORBIDDEN_CHARS.search(name) is not None:
                 Convoy.exit_error(
                     f"The name <bold>{name}</bold> contains forbidden characters that cannot be used as a file name. To avoid this error, do not set the <bold>--file-per-class</bold> option and choose another way to export the generated code."
                 )
@@ -187,37 +232,153 @@ class CPPOrchestrator:
             cc = ClassCollection()
             for c in cs:
                 cc.add(c)
-            outputs[directory / name] = cc
+            result[directory / name] = cc
         for enum in classes.enums:
             name = check(enum.id.name)
             cc = ClassCollection()
             cc.add(enum)
-            outputs[directory / name] = cc
+            result[directory / name] = cc
 
-        return outputs
+        return result
 
-    @classmethod
+    @staticmethod
     def __resolve_outputs_with_inputs(
-        cls, classes: ClassCollection, directory: Path, /
+        inputs: list[Path], outputs: list[Path], classes: ClassCollection, /
     ) -> dict[Path, ClassCollection]:
-        outputs: dict[Path, ClassCollection] = {}
+        directory = outputs[0]
+        result: dict[Path, ClassCollection] = {}
+        per_file: dict[Path, ClassCollection] = {}
 
         def resolve(objs: list[Class] | list[Enum], /) -> None:
             for obj in objs:
                 if obj.file is None:
                     Convoy.exit_error(f"The {obj.id.ctype} <bold>{obj.id.identifier}</bold> has no file attribute.")
-                outputs.setdefault(directory / obj.file.name, ClassCollection()).add(obj)
+                cc = per_file.get(obj.file)
+                if cc is None:
+                    cc = result.setdefault(directory / obj.file.name, ClassCollection())
+                    per_file[obj.file] = cc
+                cc.add(obj)
+
+        resolve(classes.classes)
+        resolve(classes.enums)
+
+        return result
+
+    @staticmethod
+    def __resolve_outputs_per_input(
+        inputs: list[Path], outputs: list[Path], classes: ClassCollection, /
+    ) -> dict[Path, ClassCollection]:
+        if len(inputs) != len(outputs):
+            Convoy.exit_error("If multiple output paths are provided, they must match the amount of input files.")
+
+        inp_to_out = dict(zip(inputs, outputs))
+        result: defaultdict[Path, ClassCollection] = defaultdict(ClassCollection)
+
+        def resolve(objs: list[Class] | list[Enum], /) -> None:
+            missing = next((obj for obj in objs if obj.file is None), None)
+            if missing is not None:
+                Convoy.exit_error(f"The class <bold>{missing.id.identifier}</bold> has no file attribute.")
+
+            # The parser emits entities file by file, so runs of the same file are contiguous
+            for file, group in groupby(objs, key=lambda obj: obj.file):
+                cc = result[inp_to_out[file]]
+                for obj in group:
+                    cc.add(obj)
 
         resolve(classes.classes)
         resolve(classes.enums)
 
-        return outputs
+        return dict(result)
+
+    @staticmethod
+    def __resolve_single_output(
+        inputs: list[Path], outputs: list[Path], classes: ClassCollection, /
+    ) -> dict[Path, ClassCollection]:
+        return {outputs[0]: classes}
+
+    @staticmethod
+    def __reject_file_per_class(
+        inputs: list[Path], outputs: list[Path], classes: ClassCollection, /
+    ) -> dict[Path, ClassCollection]:
+        Convoy.exit_error(
+            "If the option <bold>--file-per-class</bold> is selected, the output must be a single directory"
+        )
+
+    # Keyed by (single output directory, file per class, multiple outputs)
+    __OUTPUT_RESOLVERS = {
+        (True, True, False): __resolve_outputs_with_classes,
+        (True, False, False): __resolve_outputs_with_inputs,
+        (False, True, False): __reject_file_per_class,
+        (False, True, True): __reject_file_per_class,
+        (False, False, True): __resolve_outputs_per_input,
+        (False, False, False): __resolve_single_output,
+    }
 
     @classmethod
-    def __create_parser(cls, inputs: list[Path], /, *, macros: ControlMacros) -> CPParser:
-        code = {}
-        for inp in inputs:
-            with open(inp, "r") as f:
-                code[inp] = f.read()
+    def __read_inputs(
+        cls, inputs: list[Path], /, *, macros: ControlMacros
+    ) -> tuple[dict[Path, str], dict[Path, str]]:
+        def read(path: Path, /) -> tuple[Path, mmap.mmap | bytes]:
+            with path.open("rb") as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    return path, b""
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+            if hasattr(mmap, "MADV_SEQUENTIAL"):
+                mm.madvise(mmap.MADV_SEQUENTIAL)
+            return path, mm
+
+        with ThreadPoolExecutor(max_workers=min(32, max(1, len(inputs)))) as executor:
+            raw = dict(executor.map(read, inputs))
+
+        try:
+            markers = (macros.declare.encode(), macros.enum.encode())
+            if not any(c.find(m) != -1 for c in raw.values() for m in markers):
+                return {}, {}
+
+            code: dict[Path, str] = {}
+            for p, c in raw.items():
+                try:
+                    text = str(c, "utf-8")
+                except UnicodeDecodeError as e:
+                    Convoy.exit_error(
+                        f"The input file <underline>{p}</underline> is not valid UTF-8: byte {e.start} could not be decoded."
+                    )
+                code[p] = text.replace("\r\n", "\n").replace("\r", "\n")
+            digests = {p: hashlib.blake2b(c, digest_size=16).hexdigest() for p, c in raw.items()}
+        finally:
+            for c in raw.values():
+                if isinstance(c, mmap.mmap):
+                    c.close()
+
+        return code, digests
 
-        return CPParser(code, macros=macros)
+    @classmethod
+    def __cache_key(
+        cls, digests: dict[Path, str], macros: ControlMacros, parse_args: tuple, parse_kwargs: dict, /
+    ) -> str:
+        key = hashlib.blake2b(digest_size=16)
+        key.update(f"{Convoy.version}|{CPParser._SOURCE_DIGEST}|{macros}|".encode())
+        key.update(f"{parse_args}|{sorted(parse_kwargs.items())}".encode())
+        for p, d in digests.items():
+            key.update(f"|{p}:{d}".encode())
+        return key.hexdigest()
+
+    @classmethod
+    def __load_cache(cls, cache: Path, /) -> ClassCollection | None:
+        classes = CPParser._load_pickle(cache)
+        if classes is None:
+            Convoy.verbose(f"No cached classes found at <underline>{cache}</underline>.")
+            return None
+
+        if not isinstance(classes, ClassCollection):
+            Convoy.warning(f"The cache file <underline>{cache}</underline> does not contain a class collection.")
+            return None
+
+        Convoy.log(f"Inputs did not change. Loaded cached classes from <underline>{cache}</underline>.")
+        return classes
+
+    @classmethod
+    def __store_cache(cls, cache: Path, classes: ClassCollection, /) -> None:
+        CPParser._store_pickle(cache, classes)
+        Convoy.verbose(f"Cached parsed classes to <underline>{cache}</underline>.")
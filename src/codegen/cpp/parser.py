@@ -1,22 +1,27 @@
 from __future__ import annotations
 from dataclasses import dataclass, field
+from collections import defaultdict
+from functools import lru_cache
 from pathlib import Path
 
 import sys
+import os
 import re
+import hashlib
+import pickle
 
 sys.path.append(str(Path(__file__).parent.parent.parent))
 
 from convoy import Convoy
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class MacroPair:
     begin: str
     end: str
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class ControlMacros:
     declare: str
     enum: str
@@ -24,7 +29,7 @@ class ControlMacros:
     ignore: MacroPair
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Group:
     name: str
     properties: list[str]
@@ -44,7 +49,7 @@ class Group:
         return self.name
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Field:
     name: str
     visibility: str
@@ -63,24 +68,52 @@ class Field:
         return f"{self.visibility} {mods}{self.vtype} {parent}::{self.name}"
 
 
-@dataclass(frozen=True)
+@dataclass
 class FieldCollection:
     fields: list[Field] = field(default_factory=list)
     per_name: dict[str, Field] = field(default_factory=dict)
-    per_type: dict[str, list[Field]] = field(default_factory=dict)
-    per_modifier: dict[str, list[Field]] = field(default_factory=dict)
-    per_group: dict[Group, list[Field]] = field(default_factory=dict)
+    _per_type: dict[str, list[Field]] | None = field(default=None, init=False, repr=False, compare=False)
+    _per_modifier: dict[str, list[Field]] | None = field(default=None, init=False, repr=False, compare=False)
+    _per_group: dict[Group, list[Field]] | None = field(default=None, init=False, repr=False, compare=False)
 
     def add(self, f: Field, /) -> None:
-        if f.name in self.per_name:
+        if self.per_name.setdefault(f.name, f) is not f:
             Convoy.exit_error(f"Tried to add a field that already exists: <bold>{f.name}</bold>.")
         self.fields.append(f)
-        self.per_name[f.name] = f
-        self.per_type.setdefault(f.vtype, []).append(f)
-        for mod in f.modifers:
-            self.per_modifier.setdefault(mod, []).append(f)
-        for g in f.groups:
-            self.per_group.setdefault(g, []).append(f)
+        self._per_type = self._per_modifier = self._per_group = None
+
+    @property
+    def per_type(self) -> dict[str, list[Field]]:
+        if self._per_type is None:
+            self.__build_indexes()
+        return self._per_type
+
+    @property
+    def per_modifier(self) -> dict[str, list[Field]]:
+        if self._per_modifier is None:
+            self.__build_indexes()
+        return self._per_modifier
+
+    @property
+    def per_group(self) -> dict[Group, list[Field]]:
+        if self._per_group is None:
+            self.__build_indexes()
+        return self._per_group
+
+    def __build_indexes(self) -> None:
+        per_type = defaultdict(list)
+        per_modifier = defaultdict(list)
+        per_group = defaultdict(list)
+        for f in self.fields:
+            per_type[f.vtype].append(f)
+            for mod in f.modifers:
+                per_modifier[mod].append(f)
+            for g in f.groups:
+                per_group[g].append(f)
+
+        self._per_type = dict(per_type)
+        self._per_modifier = dict(per_modifier)
+        self._per_group = dict(per_group)
 
     def filter_modifier(
         self, *, include: str | list[str] | None = None, exclude: str | list[str] | None = None
@@ -95,30 +128,31 @@ class FieldCollection:
         if include and exclude:
             Convoy.exit_error("Must specify either include or exclude, not both.")
 
-        result = []
+        per_modifier = self.per_modifier
         if include is not None:
-            for f in self.fields:
-                for mod in f.modifers:
-                    if mod in include:
-                        result.append(f)
-                        break
-        elif exclude is not None:
-            for f in self.fields:
-                for mod in f.modifers:
-                    if mod in exclude:
-                        break
-                else:
-                    result.append(f)
-        return result
+            matches = {id(f) for mod in set(include) for f in per_modifier.get(mod, ())}
+            return [f for f in self.fields if id(f) in matches]
 
+        excluded = {id(f) for mod in set(exclude) for f in per_modifier.get(mod, ())}
+        return [f for f in self.fields if id(f) not in excluded]
 
-@dataclass(frozen=True)
+
+@dataclass(frozen=True, slots=True)
 class Identifier:
     identifier: str
     name: str
     ctype: str
     templdecl: str | None
     inheritance: list[str]
+    templvars: tuple[str, ...] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        templvars = (
+            CPParser._split_template_arguments(self.identifier.split("<", 1)[1].strip(">").strip())
+            if "<" in self.identifier
+            else ()
+        )
+        object.__setattr__(self, "templvars", templvars)
 
     def template_matches(self, templargs: str, /) -> int:
         if self.templdecl is None:
@@ -135,9 +169,9 @@ class Identifier:
 
         return matches
 
-    def template_arguments_instantiation_pairs(self, templargs: str, /) -> tuple[list[str], list[str]]:
-        templvars1 = self.identifier.split("<", 1)[1].strip(">").strip().replace(", ", ",").split(",")
-        templvars2 = templargs.replace(", ", ",").split(",")
+    def template_arguments_instantiation_pairs(self, templargs: str, /) -> tuple[tuple[str, ...], tuple[str, ...]]:
+        templvars1 = self.templvars
+        templvars2 = CPParser._split_template_arguments(templargs)
         if len(templvars1) != len(templvars2):
             Convoy.exit_error(
                 f"The amount of template arguments between the class declaration to instantiate (<bold>{self.identifier}</bold>) and the ones to instantiate (<bold>{self.name}<{templargs}></bold>) does not match."
@@ -145,7 +179,7 @@ class Identifier:
         return templvars1, templvars2
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Class:
     id: Identifier
     parents: list[Class]
@@ -167,7 +201,7 @@ class Class:
             if t1 == t2:
                 if t1 in templdecl:
                     idx = templdecl.index(t1)
-                    tdecl.append(self.id.templdecl.replace(", ", ",").split(",")[idx])
+                    tdecl.append(CPParser._split_template_arguments(self.id.templdecl)[idx])
 
                 continue
             if t1 not in templdecl:
@@ -179,8 +213,9 @@ class Class:
                 f"Instantiating <bold>{t1}</bold> to <bold>{t2}</bold> in all fields of <bold>{self.id.identifier}</bold>."
             )
 
+            pattern = re.compile(rf"\b{re.escape(t1)}\b")
             for f in self.fields.fields:
-                vtype = re.sub(rf"\b{t1}\b", t2, f.vtype)
+                vtype = sys.intern(pattern.sub(t2, f.vtype))
                 fi = Field(f.name, f.visibility, vtype, f.modifers, f.groups)
                 fields.add(fi)
 
@@ -200,7 +235,7 @@ class Class:
         return Class(id, self.parents, self.namespaces, fields, self.file)
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Enum:
     id: Identifier
     namespaces: list[str]
@@ -219,14 +254,13 @@ class ClassCollection:
         if isinstance(c, Enum):
             self.enums.append(c)
             return
-        if c.id.identifier in self.per_identifier:
+        if self.per_identifier.setdefault(c.id.identifier, c) is not c:
             Convoy.exit_error(f"Tried to add a class that already exists: <bold>{c.id.identifier}</bold>.")
         self.classes.append(c)
         self.per_name.setdefault(c.id.name, []).append(c)
-        self.per_identifier[c.id.identifier] = c
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class _ClassInfo:
     id: Identifier
     file: Path | None
@@ -243,30 +277,47 @@ class _ClassInfoCollection:
     per_identifier: dict[str, _ClassInfo] = field(default_factory=dict)
 
     def add(self, c: _ClassInfo, /) -> None:
-        if c.id.identifier in self.per_identifier:
+        if self.per_identifier.setdefault(c.id.identifier, c) is not c:
             Convoy.exit_error(f"Tried to add a class info that already exists: <bold>{c.id.identifier}</bold>.")
         self.classes.append(c)
         self.per_name.setdefault(c.id.name, []).append(c)
-        self.per_identifier[c.id.identifier] = c
 
 
 class CPParser:
-
-    def __init__(self, code: str | dict[Path, str], /, *, macros: ControlMacros) -> None:
-        if not isinstance(code, str):
-            code = CPParser.__merge_code(code)
-        self.__code = (
-            code.replace("<class", "<typename").replace(",class", ",typename").replace("template ", "template")
-        )
+    # Cached results are pickles of this module's dataclasses, so any change to the parser invalidates them
+    _SOURCE_DIGEST = hashlib.blake2b(Path(__file__).read_bytes(), digest_size=8).hexdigest()
+
+    def __init__(
+        self, code: str | dict[Path, str], /, *, macros: ControlMacros, cache_dir: Path | None = None
+    ) -> None:
+        files: dict[Path | None, str] = {None: code} if isinstance(code, str) else dict(code)
+        self.__code = {
+            p: c.replace("<class", "<typename").replace(",class", ",typename").replace("template ", "template")
+            for p, c in files.items()
+        }
         self.__macros = macros
+        self.__cache_dir = cache_dir
+        self.__entity_pattern = re.compile(
+            "|".join(re.escape(k) for k in ("CPParser file", macros.enum, "namespace", "enum", "class", "struct"))
+        )
+        self.__declare_pattern = re.compile(rf"{re.escape(macros.declare)}\((.*?)\)")
+        self.__enum_pattern = re.compile(rf"{re.escape(macros.enum)}\((.*?)\)")
+        self.__group_pattern = re.compile(rf"{re.escape(macros.group.begin)}\((.*?)\)")
+        self.__namespace_pattern = re.compile(r"namespace ([a-zA-Z0-9_::]+)")
+        self.__scope_pattern = re.compile("|".join(re.escape(k) for k in ("{", "}", macros.declare)))
+        self.__declaration_pattern = re.compile(r", |final")
+        self.__access_pattern = re.compile(r"\b(?:public|private|protected)\b")
+        self.__forbidden_pattern = re.compile(r"[{}();]")
+        self.__comment_pattern = re.compile(r"/\*.*?\*/|//(?!\s*CPParser file:)[^\n]*", re.DOTALL)
         self.__cache = ClassCollection()
+        self.__scan_messages: list[tuple[str, str]] = []
         self.__class_pattern = re.compile(
             r"""
             (?:template\s*<([^\(\)]*)>\s*)*
             (?:class|struct)\s+
             (?:alignas\s*\(.+\)\s*)*
             (?:[\w\s]*\b)?
-            ((?:\w+(?:<.*>)?::)*\w+(?:<.*>)?)\s*
+            ((?:(?:\w+::)*\w+<.*>::)?(?:\w+::)*\w+(?:<.*>)?)\s*
             (?::\s*(.+))?
         """,
             re.VERBOSE,
@@ -287,21 +338,21 @@ class CPParser:
                (\[\[maybe_unused\]\])\s+|
                (\[\[deprecated\]\])\s+|
                (\[\[no_unique_address\]\])\s+)*
-            ((?:\w+(?:<.*>)?::)*\w+(?:<.*>)?(?:\s*[&\*]\s*)?)\s*
-            (\w+)(?:\s*(?:{.*})*\s*)?(?!\s*\(\));
+            ((?:(?:\w+::)*\w+<.*>::)?(?:\w+::)*\w+(?:<.*>)?(?:\s*[&\*]\s*)?)\s*
+            (\w+)(?:\s*(?:{.*})?\s*)?(?!\s*\(\));
         """,
             re.VERBOSE,
         )
 
     def has_declare_macro(self) -> bool:
-        return self.__macros.declare in self.__code
+        return any(self.__macros.declare in c for c in self.__code.values())
 
     def clear_cache(self) -> None:
         self.__cache = ClassCollection()
 
     def remove_comments(self) -> None:
-        self.__code = re.sub(r"//(?!\s*CPParser file:).*", "", self.__code)
-        self.__code = re.sub(r"/\*.*?\*/", "", self.__code, flags=re.DOTALL)
+        for p, c in self.__code.items():
+            self.__code[p] = self.__comment_pattern.sub("", c)
 
     def parse(
         self,
@@ -319,87 +370,6 @@ class CPParser:
         classes = ClassCollection()
         clinfos = self.__find_entities(line_delm=line_delm)
 
-        def parse_class(clinfo: _ClassInfo, /, *, override_declare_macro=False) -> Class | None:
-            declm = self.__macros.declare
-            if clinfo.has_declare_macro:
-                pids = clinfo.macro_args.copy()
-                if not pids:
-                    Convoy.exit_error(
-                        f"The first argument of the declare macro <bold>{declm}</bold> must be the {clinfo.id.ctype} name, but it has currently no arguments. Expected <bold>{clinfo.id.name}</bold>."
-                    )
-                name = pids.pop(0)
-                if name != clinfo.id.name:
-                    Convoy.exit_error(
-                        f"The first argument of the declare macro <bold>{declm}</bold> must be the {clinfo.id.ctype} name, but it found <bold>{name}</bold>. Expected: <bold>{clinfo.id.name}</bold>."
-                    )
-                if resolve_hierarchies_with_inheritance:
-                    pids = clinfo.id.inheritance
-            elif override_declare_macro:
-                pids = clinfo.id.inheritance if resolve_hierarchies_with_inheritance else []
-            else:
-                return None
-
-            parents = []
-            for pid in pids:
-                if pid in self.__cache.per_identifier:
-                    parents.append(self.__cache.per_identifier[pid])
-                    continue
-                needs_instantiation = pid not in clinfos.per_identifier
-                templargs = pid.split("<", 1)[1].strip(">").strip()
-                if needs_instantiation:
-                    Convoy.log(
-                        f"The parent identifier <bold>{pid}</bold> of the {clinfo.id.ctype} <bold>{clinfo.id.identifier}</bold> was not found explicitly. Attempting to instantiate from a general definition..."
-                    )
-                    errfn = Convoy.warning if resolve_hierarchies_with_inheritance else Convoy.exit_error
-
-                    if "<" not in pid:
-                        errfn(
-                            f"The parent identifier <bold>{pid}</bold> is not templated. An instantiation is not possible."
-                        )
-                        continue
-
-                    pname = pid.split("<", 1)[0]
-                    if pname not in clinfos.per_name:
-                        errfn(
-                            f"The parent name <bold>{pname}</bold>, extracted from the identifier <bold>{pid}</bold>, of the {clinfo.id.ctype} <bold>{clinfo.id.identifier}</bold> was not found, and so it is not possible to instantiate and resolve the parent's definition."
-                        )
-                        continue
-                    max_matches = 0
-                    pclinfo = None
-                    for p in clinfos.per_name[pname]:
-                        if p.id.templdecl is None:
-                            Convoy.verbose(
-                                f"The {p.id.ctype} <bold>{p.id.identifier}</bold> is not elligible as it does not have a template declaration."
-                            )
-                            continue
-                        matches = p.id.template_matches(templargs)
-                        if matches >= max_matches:
-                            pclinfo = p
-                            max_matches = matches
-
-                    if pclinfo is None:
-                        errfn(f"No elligible class or struct was found from which to instantiate <bold>{pid}</bold>.")
-                        continue
-                    else:
-                        Convoy.verbose(
-                            f"Found an elligible {pclinfo.id.ctype} to instantiate: <bold>{pclinfo.id.identifier}</bold>."
-                        )
-
-                else:
-                    pclinfo = clinfos.per_identifier[pid]
-
-                c = parse_class(pclinfo, override_declare_macro=True)
-                if c is None:
-                    Convoy.exit_error(
-                        f"The function parse_class returned None when overriding declare macro for parent <bold>{pid}</bold>. It should not happen."
-                    )
-
-                if needs_instantiation:
-                    c = c.instantiate(templargs)
-                parents.append(c)
-
-            return self.__create_class(clinfo, parents, reserved_group_names)
-
         for clinfo in clinfos.classes:
             if clinfo.id.ctype == "enum":
                 enum = self.__create_enum(clinfo)
@@ -407,7 +377,7 @@ class CPParser:
                     classes.add(enum)
                 continue
 
-            cl = parse_class(clinfo)
+            cl = self.__parse_class(clinfo, clinfos, reserved_group_names, resolve_hierarchies_with_inheritance)
             if cl is not None:
                 classes.add(cl)
 
@@ -422,41 +392,193 @@ class CPParser:
                             f" - The field <bold>{f.as_str(parent.id.identifier)}</bold> is being shadowed by a field with the same name in the child {c.id.ctype} <bold>{c.id.identifier}</bold>."
                         )
                     else:
-                        Convoy.verbose(
-                            f" - The field <bold>{f.as_str(parent.id.identifier)}</bold> has been inherited by <bold>{c.id.identifier}</bold>."
-                        )
+                        if Convoy.is_verbose:
+                            Convoy.verbose(
+                                f" - The field <bold>{f.as_str(parent.id.identifier)}</bold> has been inherited by <bold>{c.id.identifier}</bold>."
+                            )
                         c.fields.add(f)
 
         return classes
 
+    def __parse_class(
+        self,
+        clinfo: _ClassInfo,
+        clinfos: _ClassInfoCollection,
+        reserved_group_names: list[str],
+        resolve_hierarchies_with_inheritance: bool,
+        /,
+        *,
+        override_declare_macro: bool = False,
+    ) -> Class | None:
+        declm = self.__macros.declare
+        if clinfo.has_declare_macro:
+            pids = clinfo.macro_args.copy()
+            if not pids:
+                Convoy.exit_error(
+                    f"The first argument of the declare macro <bold>{declm}</bold> must be the {clinfo.id.ctype} name, but it has currently no arguments. Expected <bold>{clinfo.id.name}</bold>."
+                )
+            name = pids.pop(0)
+            if name != clinfo.id.name:
+                Convoy.exit_error(
+                    f"The first argument of the declare macro <bold>{declm}</bold> must be the {clinfo.id.ctype} name, but it found <bold>{name}</bold>. Expected: <bold>{clinfo.id.name}</bold>."
+                )
+            if resolve_hierarchies_with_inheritance:
+                pids = clinfo.id.inheritance
+        elif override_declare_macro:
+            pids = clinfo.id.inheritance if resolve_hierarchies_with_inheritance else []
+        else:
+            return None
+
+        parents = []
+        for pid in pids:
+            if pid in self.__cache.per_identifier:
+                parents.append(self.__cache.per_identifier[pid])
+                continue
+            needs_instantiation = pid not in clinfos.per_identifier
+            templargs = pid.split("<", 1)[1].strip(">").strip()
+            if needs_instantiation:
+                Convoy.log(
+                    f"The parent identifier <bold>{pid}</bold> of the {clinfo.id.ctype} <bold>{clinfo.id.identifier}</bold> was not found explicitly. Attempting to instantiate from a general definition..."
+                )
+                errfn = Convoy.warning if resolve_hierarchies_with_inheritance else Convoy.exit_error
+
+                if "<" not in pid:
+                    errfn(
+                        f"The parent identifier <bold>{pid}</bold> is not templated. An instantiation is not possible."
+                    )
+                    continue
+
+                pname = pid.split("<", 1)[0]
+                if pname not in clinfos.per_name:
+                    errfn(
+                        f"The parent name <bold>{pname}</bold>, extracted from the identifier <bold>{pid}</bold>, of the {clinfo.id.ctype} <bold>{clinfo.id.identifier}</bold> was not found, and so it is not possible to instantiate and resolve the parent's definition."
+                    )
+                    continue
+                max_matches = 0
+                pclinfo = None
+                for p in clinfos.per_name[pname]:
+                    if p.id.templdecl is None:
+                        Convoy.verbose(
+                            f"The {p.id.ctype} <bold>{p.id.identifier}</bold> is not elligible as it does not have a template declaration."
+                        )
+                        continue
+                    matches = p.id.template_matches(templargs)
+                    if matches >= max_matches:
+                        pclinfo = p
+                        max_matches = matches
+
+                if pclinfo is None:
+                    errfn(f"No elligible class or struct was found from which to instantiate <bold>{pid}</bold>.")
+                    continue
+                else:
+                    Convoy.verbose(
+                        f"Found an elligible {pclinfo.id.ctype} to instantiate: <bold>{pclinfo.id.identifier}</bold>."
+                    )
+
+            else:
+                pclinfo = clinfos.per_identifier[pid]
+
+            c = self.__parse_class(
+                pclinfo,
+                clinfos,
+                reserved_group_names,
+                resolve_hierarchies_with_inheritance,
+                override_declare_macro=True,
+            )
+            if c is None:
+                Convoy.exit_error(
+                    f"The function __parse_class returned None when overriding declare macro for parent <bold>{pid}</bold>. It should not happen."
+                )
+
+            if needs_instantiation:
+                c = c.instantiate(templargs)
+            parents.append(c)
+
+        return self.__create_class(clinfo, parents, reserved_group_names)
+
     def __find_entities(
         self,
         *,
         line_delm: str = "\n",
     ) -> _ClassInfoCollection:
+        classes = _ClassInfoCollection()
+        enums: list[str] = []
+        for file, code in self.__code.items():
+            clinfos, fenums = self.__scan_file_cached(file, code, line_delm)
+            for name in fenums:
+                if name in enums:
+                    Convoy.warning(f"Found duplicate enum declaration macro: <bold>{name}</bold>.")
+            for clinfo in clinfos:
+                if clinfo.id.ctype == "enum" and not clinfo.has_declare_macro and clinfo.id.identifier not in enums:
+                    continue
+                if clinfo.id.identifier in classes.per_identifier:
+                    Convoy.exit_error(
+                        f"Found a {clinfo.id.ctype} with a duplicate identifier: <bold>{clinfo.id.identifier}</bold>."
+                    )
+                classes.add(clinfo)
+            enums.extend(fenums)
+
+        return classes
 
-        lines = self.__code.split(line_delm)
+    def __scan_file_cached(
+        self, file: Path | None, code: str, line_delm: str, /
+    ) -> tuple[list[_ClassInfo], list[str]]:
+        if self.__cache_dir is None:
+            return self.__scan_file(file, code, line_delm)
+
+        key = hashlib.blake2b(digest_size=16)
+        key.update(f"{Convoy.version}|{CPParser._SOURCE_DIGEST}|{self.__macros}|{line_delm!r}|{file}|".encode())
+        key.update(code.encode())
+        cache = self.__cache_dir / "entities" / f"{key.hexdigest()}.pkl"
+
+        scanned = CPParser._load_pickle(cache)
+        if scanned is not None:
+            Convoy.verbose(f"Reusing cached entities for <underline>{file}</underline>.")
+            clinfos, enums, messages = scanned
+            # The scan is skipped on a hit, so what it reported the first time is reported again
+            for level, msg in messages:
+                getattr(Convoy, level)(msg)
+            return clinfos, enums
+
+        clinfos, enums = self.__scan_file(file, code, line_delm)
+        CPParser._store_pickle(cache, (clinfos, enums, self.__scan_messages))
+        return clinfos, enums
+
+    def __scan_file(self, file: Path | None, code: str, line_delm: str, /) -> tuple[list[_ClassInfo], list[str]]:
+        self.__scan_messages = []
+        nlines = code.count(line_delm) + 1
+        declenum = self.__macros.enum
+        declm = self.__macros.declare
         namespaces = []
-        file = None
         index = 0
-        classes = _ClassInfoCollection()
+        classes: list[_ClassInfo] = []
         enums = []
-        while index < len(lines):
-            line = lines[index].strip()
+
+        # Lines without any of the entity keywords are no-ops, so jump straight to the ones that have them
+        lineno = 0
+        pos = 0
+        for keyword in self.__entity_pattern.finditer(code):
+            lineno += code.count(line_delm, pos, keyword.start())
+            pos = keyword.start()
+            if lineno < index:
+                continue
+            index = lineno
+
+            begin, finish = self.__line_bounds(code, pos, line_delm)
+            line = code[begin:finish].strip()
             if "CPParser file" in line:
                 file = Path(line.split(": ", 1)[1].strip("\n").strip())
 
-            declenum = self.__macros.enum
             if declenum in line and "#define" not in line:
-                mtch = re.match(rf"{declenum}\((.*?)\)", line)
+                mtch = self.__enum_pattern.match(line)
                 if mtch is None:
                     Convoy.exit_error(
                         f"Failed to match enum declare macro arguments for the line <bold>{line}</bold>. Declare macro: <bold>{declenum}</bold>."
                     )
                 name = mtch.group(1)
                 if name in enums:
-                    Convoy.warning(f"Found duplicate enum declaration macro: <bold>{name}</bold>.")
-                Convoy.log(f"Found enum marked with the declare macro: <bold>{declenum}</bold>.")
+                    self.__report("warning", f"Found duplicate enum declaration macro: <bold>{name}</bold>.")
+                self.__report("log", f"Found enum marked with the declare macro: <bold>{declenum}</bold>.")
                 enums.append(name)
                 index += 1
                 continue
@@ -465,7 +587,7 @@ class CPParser:
                 index += 1
                 continue
 
-            match = re.match(r"namespace ([a-zA-Z0-9_::]+)", line)
+            match = self.__namespace_pattern.match(line)
             if match is not None:
                 namespace = match.group(1).split("::")
                 namespaces.extend(namespace)
@@ -491,34 +613,45 @@ class CPParser:
                 index += 1
                 continue
 
-            start = index
-            end = len(lines)
+            end = len(code)
             macro_args = []
             has_declm = False
 
-            template_line = (
-                lines[index - 1].strip()
-                if index > 0
-                and "template" in lines[index - 1]
-                and "struct" not in lines[index - 1]
-                and "class" not in lines[index - 1]
-                else None
-            )
+            template_line = None
+            if index > 0:
+                previous = begin - len(line_delm)
+                previous = code[self.__line_bounds(code, previous, line_delm)[0] : previous]
+                if "template" in previous and "struct" not in previous and "class" not in previous:
+                    template_line = previous.strip()
 
-            Convoy.verbose(f"Found a {clstype} declaration. ")
+            self.__report("verbose", f"Found a {clstype} declaration. ")
             if template_line is not None:
                 if template_line.count("template") > 1:
-                    Convoy.warning(f"Nested template arguments are not supported: <bold>{template_line}</bold>.")
+                    self.__report(
+                        "warning", f"Nested template arguments are not supported: <bold>{template_line}</bold>."
+                    )
                     index += 1
                     continue
 
-                Convoy.verbose(f" - <bold>{template_line}</bold>")
-            Convoy.verbose(f" - <bold>{lines[index].strip()}</bold>")
+                self.__report("verbose", f" - <bold>{template_line}</bold>")
+            self.__report("verbose", f" - <bold>{line}</bold>")
 
+            # Only lines with braces or the declare macro can change the scan state, so hop between those
             scope_counter = 0
             can_exit = False
-            while index < end:
-                subline = lines[index].strip()
+            cursor = begin
+            subindex = index
+            last = -1
+            index = nlines
+            for token in self.__scope_pattern.finditer(code, cursor):
+                subindex += code.count(line_delm, cursor, token.start())
+                cursor = token.start()
+                if subindex == last:
+                    continue
+                last = subindex
+
+                subbegin, subfinish = self.__line_bounds(code, cursor, line_delm)
+                subline = code[subbegin:subfinish].strip()
                 if "{" in subline:
                     scope_counter += 1
                     can_exit = True
@@ -526,16 +659,16 @@ class CPParser:
                     scope_counter -= 1
 
                 if scope_counter == 0 and can_exit:
-                    end = index + 1
+                    index = subindex
+                    end = subfinish
                     break
 
-                declm = self.__macros.declare
                 if declm in subline:
                     if has_declm:
                         Convoy.exit_error(f"Found a duplicate declare macro statement for the {clstype}.")
-                    Convoy.log(f"Found a {clstype} marked with the declare macro <bold>{declm}</bold>.")
+                    self.__report("log", f"Found a {clstype} marked with the declare macro <bold>{declm}</bold>.")
 
-                    mtch = re.match(rf"{declm}\((.*?)\)", subline)
+                    mtch = self.__declare_pattern.match(subline)
                     if mtch is None:
                         Convoy.exit_error(
                             f"Failed to match declare macro arguments for the line <bold>{subline}</bold>. Declare macro: <bold>{declm}</bold>."
@@ -543,50 +676,87 @@ class CPParser:
                     macro_args = [m.strip() for m in Convoy.nested_split(mtch.group(1), ",", openers="<", closers=">")]
                     has_declm = True
 
-                index += 1
+            clsdecl = code[begin:finish]
+            if template_line is not None:
+                clsdecl += "\n" + template_line
 
-            clsdecl = lines[start] if template_line is None else lines[start] + "\n" + template_line
-            clsbody = lines[start + 1 : end]
+            body = finish + len(line_delm)
+            clsbody = code[body:end].split(line_delm) if body <= end else []
 
             identifier = self.__parse_identifier(clsdecl, clstype)
-            if is_enum and identifier.identifier not in enums:
-                index += 1
-                continue
-
-            if identifier.identifier in classes.per_identifier:
-                Convoy.exit_error(
-                    f"Found a {clstype} with a duplicate identifier: <bold>{identifier.identifier}</bold>."
-                )
+            if is_enum:
+                has_declm = identifier.identifier in enums
 
             clinfo = _ClassInfo(identifier, file, namespaces, clsbody, macro_args, has_declm)
-            classes.add(clinfo)
+            classes.append(clinfo)
 
             index += 1
-        return classes
+        return classes, enums
+
+    def __report(self, level: str, msg: str, /) -> None:
+        getattr(Convoy, level)(msg)
+        self.__scan_messages.append((level, msg))
 
     @classmethod
-    def __merge_code(cls, code: dict[Path, str], /) -> str:
-        merged = ""
-        for p, c in code.items():
-            merged += f"\n// CPParser file: {p}\n" + c
-        return merged
+    def __line_bounds(cls, code: str, offset: int, line_delm: str, /) -> tuple[int, int]:
+        begin = code.rfind(line_delm, 0, offset)
+        end = code.find(line_delm, offset)
+        return (0 if begin == -1 else begin + len(line_delm)), (len(code) if end == -1 else end)
 
     @classmethod
-    def _split_template_list(cls, tlist: str, /) -> list[str]:
-        return [
+    def _load_pickle(cls, path: Path, /) -> object | None:
+        if not path.is_file():
+            return None
+        try:
+            with path.open("rb") as f:
+                return pickle.load(f)
+        except Exception as e:
+            Convoy.warning(f"Failed to load cached data from <underline>{path}</underline>: {e}.")
+            return None
+
+    @classmethod
+    def _store_pickle(cls, path: Path, obj: object, /) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        with tmp.open("wb") as f:
+            pickle.dump(obj, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+
+    @classmethod
+    @lru_cache(maxsize=None)
+    def _split_template_list(cls, tlist: str, /) -> tuple[str, ...]:
+        return tuple(
             Convoy.nested_split(var, " ", openers="<", closers=">", n=1)[1]
             for var in tlist.replace(", ", ",").split(",")
-        ]
+        )
+
+    @classmethod
+    @lru_cache(maxsize=None)
+    def _split_template_arguments(cls, targs: str, /) -> tuple[str, ...]:
+        return tuple(targs.replace(", ", ",").split(","))
+
+    @classmethod
+    def __split_single_colon(cls, code: str, /) -> list[str]:
+        index = code.find(":")
+        while index != -1:
+            end = index + 1
+            while end < len(code) and code[end] == ":":
+                end += 1
+            if end == index + 1:
+                return [code[:index], code[end:]]
+            index = code.find(":", end)
+        return [code]
 
     def __parse_identifier(self, clsdecl: str, clstype: str, /) -> Identifier:
-        Convoy.verbose(f"Attempting to parse {clstype} identifier.")
+        self.__report("verbose", f"Attempting to parse {clstype} identifier.")
         if clstype == "enum":
             id = clsdecl.split(":", 1)[0].strip()
             name = id.rsplit(" ", 1)[-1].strip()
-            Convoy.verbose(f"Extracted identifier: <bold>{name}</bold>.")
+            self.__report("verbose", f"Extracted identifier: <bold>{name}</bold>.")
             return Identifier(name, name, clstype, None, [])
 
-        declaration = re.match(self.__class_pattern, clsdecl.replace(", ", ",").replace("final", "").strip())
+        sanitized = self.__declaration_pattern.sub(lambda m: "," if m[0] == ", " else "", clsdecl)
+        declaration = self.__class_pattern.match(sanitized.strip())
         if declaration is None:
             Convoy.exit_error(
                 f"A match was not found when trying to extract the name of the {clstype}. The identified declaration was the following: <bold>{clsdecl}</bold>."
@@ -599,35 +769,37 @@ class CPParser:
 
         if identifier is not None:
             identifier = identifier.strip().replace(",", ", ")
-            Convoy.verbose(f" - Extracted initial identifier: <bold>{identifier}</bold>.")
-            parts = re.split(r"(?<!:):(?!:)", identifier, maxsplit=1)
+            self.__report("verbose", f" - Extracted initial identifier: <bold>{identifier}</bold>.")
+            parts = self.__split_single_colon(identifier)
             if len(parts) > 1:
-                Convoy.verbose(
+                self.__report(
+                    "verbose",
                     f" - Detected possible template arguments in inheritance list that may have caused the latter to leak into the identifier."
                 )
                 identifier, inheritance = [p.strip() for p in parts]
-                Convoy.verbose(f" - Fixed identifier: <bold>{identifier}</bold>.")
+                self.__report("verbose", f" - Fixed identifier: <bold>{identifier}</bold>.")
         else:
             Convoy.exit_error(
                 f"Failed to extract a {clstype} identifier with the following declaration line: <bold>{clsdecl}</bold>."
             )
         if templdecl is not None:
             templdecl.strip()
-            Convoy.verbose(f" - Extracted template arguments declaration: <bold>{templdecl}</bold>.")
+            self.__report("verbose", f" - Extracted template arguments declaration: <bold>{templdecl}</bold>.")
         else:
-            Convoy.verbose(" - No template declaration was found.")
+            self.__report("verbose", " - No template declaration was found.")
 
         if inheritance is not None:
-            inheritance = inheritance.replace("public", "").replace("private", "").replace("protected", "").strip()
-            Convoy.verbose(f" - Extracted inheritance list: <bold>{inheritance}</bold>.")
+            inheritance = self.__access_pattern.sub("", inheritance).strip()
+            self.__report("verbose", f" - Extracted inheritance list: <bold>{inheritance}</bold>.")
         else:
-            Convoy.verbose(" - No inheritance list was found.")
+            self.__report("verbose", " - No inheritance list was found.")
 
         if templdecl is not None and "<" not in identifier:
             template_vars = ", ".join(CPParser._split_template_list(templdecl))
 
             identifier = f"{identifier}<{template_vars}>"
-            Convoy.verbose(
+            self.__report(
+                "verbose",
                 f" - Generated a more accurate identifier with template arguments: <bold>{identifier}</bold>."
             )
 
@@ -651,21 +823,17 @@ class CPParser:
             )
 
         Convoy.log(f"Gathering values for enum <bold>{clinfo.id.identifier}</bold>.")
-        forbidden = ["{", "}", "(", ")", ";"]
         values = {}
         for line in clinfo.body:
             line = line.strip(",").strip()
-            if not line:
+            if not line or self.__forbidden_pattern.search(line) is not None:
                 continue
-            for f in forbidden:
-                if f in line:
-                    break
-            else:
-                splt = line.split("=", 1)
-                name = splt.pop(0).strip()
-                val = splt[0].strip() if splt else None
-                values[name] = val
-                Convoy.verbose(f" - Registered enum entry <bold>{name}</bold>.")
+
+            splt = line.split("=", 1)
+            name = splt.pop(0).strip()
+            val = splt[0].strip() if splt else None
+            values[name] = val
+            Convoy.verbose(f" - Registered enum entry <bold>{name}</bold>.")
 
         return Enum(clinfo.id, clinfo.namespaces, values, clinfo.file)
 
@@ -690,6 +858,7 @@ class CPParser:
             )
 
         groups = []
+        unique_groups = ()
 
         fields = FieldCollection()
 
@@ -697,10 +866,12 @@ class CPParser:
         ignore = False
 
         visibility = "private" if clinfo.id.ctype == "class" else "public"
+        verbose = Convoy.is_verbose
 
         def check_group_macros(line: str, /) -> None:
+            nonlocal unique_groups
             if self.__macros.group.begin in line:
-                group = re.match(rf"{self.__macros.group.begin}\((.*?)\)", line)
+                group = self.__group_pattern.match(line)
                 if group is not None:
                     group = group.group(1).replace('"', "")
                 else:
@@ -714,18 +885,21 @@ class CPParser:
                         f"Group name cannot be <bold>{name}</bold>. It is listed as a reserved name: {reserved_group_names}."
                     )
 
-                if not properties:
+                if verbose and not properties:
                     Convoy.verbose(f" - Pushing group <bold>{name}</bold>.")
-                else:
+                elif verbose:
                     Convoy.verbose(
                         f" - Pushing group <bold>{name}</bold> with properties <bold>{', '.join(properties)}</bold>."
                     )
 
                 groups.append(Group(name, properties))
+                unique_groups = tuple({g.name: g for g in groups}.values())
 
             elif self.__macros.group.end in line:
                 name = groups.pop()
-                Convoy.verbose(f" - Popping group <bold>{name}</bold>.")
+                unique_groups = tuple({g.name: g for g in groups}.values())
+                if verbose:
+                    Convoy.verbose(f" - Popping group <bold>{name}</bold>.")
 
         def check_ignore_macros(line: str, /) -> bool:
             nonlocal ignore
@@ -737,6 +911,8 @@ class CPParser:
 
             return True
 
+        specifiers = tuple((v, f"{v}:") for v in ("private", "public", "protected"))
+        match_field = self.__field_pattern.match
         for line in clinfo.body:
             line = line.strip()
             check_group_macros(line)
@@ -754,25 +930,24 @@ class CPParser:
             if "using" in line or scope_counter != 1:
                 continue
 
-            def check_privacy(look_for: str, /) -> None:
-                nonlocal visibility
-                if f"{look_for}:" in line:
-                    visibility = look_for
+            if ":" in line:
+                for look_for, specifier in specifiers:
+                    if specifier in line:
+                        visibility = look_for
 
-            check_privacy("private")
-            check_privacy("public")
-            check_privacy("protected")
             count = line.count("=")
             if count > 1:
                 continue
             if count == 1:
                 decl, val = line.split("=", 1)
                 line = f"{decl.strip()}{{{val.strip(';').strip()}}};"
+            elif ";" not in line:
+                continue
 
-            match = re.match(self.__field_pattern, line)
+            match = match_field(line)
             if match is None:
                 continue
-            modifiers = [match.group(g) for g in range(1, 14) if match.group(g) is not None]
+            modifiers = [sys.intern(m) for m in match.groups()[:13] if m is not None]
 
             vtype = match.group(14)
             vname = match.group(15)
@@ -783,12 +958,13 @@ class CPParser:
             field = Field(
                 vname,
                 visibility,
-                vtype.replace(",", ", "),
+                sys.intern(vtype.replace(",", ", ")),
                 modifiers,
-                list({g.name: g for g in groups}.values()),
+                list(unique_groups),
             )
 
-            Convoy.verbose(f" - Registered field <bold>{field.as_str(clinfo.id.identifier)}</bold>.")
+            if verbose:
+                Convoy.verbose(f" - Registered field <bold>{field.as_str(clinfo.id.identifier)}</bold>.")
             fields.add(field)
 
         if ignore:
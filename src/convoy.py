@@ -4,8 +4,10 @@ import subprocess
 import os
 import ctypes
 import glob
+import stat
 
 from time import perf_counter
+from argparse import ArgumentParser
 from pathlib import Path
 from typing import NoReturn, TypeVar
 
@@ -352,37 +354,50 @@ class _MetaConvoy(type):
         if cwd is None:
             cwd = Path(os.getcwd()).resolve()
 
+        checks = check_exists or require_files or require_directories or exclude_files or exclude_directories or mkdir
+
+        # A single stat answers every check, mirroring is_file and is_dir without a syscall per query
         def run_checks(path: Path, /) -> Path | None:
-            if check_exists and not path.exists():
+            if not checks:
+                return path
+            try:
+                mode = path.stat().st_mode
+            except OSError:
+                mode = None
+            is_file = (mode is not None and stat.S_ISREG(mode)) or bool(path.suffix)
+            is_dir = (mode is not None and stat.S_ISDIR(mode)) or not path.suffix
+
+            if check_exists and mode is None:
                 Convoy.exit_error(f"The path <underline>{path}</underline> does not exist.")
-            if require_files and not self.is_file(path):
+            if require_files and not is_file:
                 Convoy.exit_error(f"The path <underline>{path}</underline> is not a file.")
-            if require_directories and not self.is_dir(path):
+            if require_directories and not is_dir:
                 Convoy.exit_error(f"The path <underline>{path}</underline> is not a directory.")
 
-            if (exclude_files and not self.is_file(path)) or (exclude_directories and not self.is_dir(path)):
+            if (exclude_files and not is_file) or (exclude_directories and not is_dir):
                 return None
 
-            if mkdir and not self.is_file(path):
+            if mkdir and not is_file:
                 path.mkdir(parents=True, exist_ok=True)
             return path
 
         result: list[Path] = []
+        expanded: dict[str, list[Path]] = {}
         for path in paths:
             if isinstance(path, Path):
                 path = str(path)
             if glob.has_magic(path):
-                iterator = cwd.rglob(path) if recursive else cwd.glob(path)
-                for p in iterator:
-                    p = run_checks(p.resolve())
-                    if p is not None:
-                        result.append(p)
+                if path not in expanded:
+                    iterator = cwd.rglob(path) if recursive else cwd.glob(path)
+                    checked = (run_checks(p.resolve()) for p in iterator)
+                    expanded[path] = [p for p in checked if p is not None]
+                result.extend(expanded[path])
             else:
                 path = run_checks(Path(path).resolve())
                 if path is not None:
                     result.append(path)
 
-        return result if not remove_duplicates else list(set(result))
+        return result if not remove_duplicates else list(dict.fromkeys(result))
 
     def ncheck(self, param: T | None, /, *, msg: str | None = None) -> T:
         if param is None:
@@ -407,6 +422,25 @@ class _MetaConvoy(type):
         msg = self.__format_message(msg, "prompt")
         input(msg)
 
+    # Meant to be passed as a parent so that every script exposes the same prompt flags
+    def prompt_parser(self) -> ArgumentParser:
+        parser = ArgumentParser(add_help=False)
+        parser.add_argument(
+            "-s",
+            "--safe",
+            action="store_true",
+            default=False,
+            help="Prompt before executing commands. This setting cannot be used with the '-y' flag.",
+        )
+        parser.add_argument(
+            "-y",
+            "--yes",
+            action="store_true",
+            default=False,
+            help="Skip all prompts and proceed with everything.",
+        )
+        return parser
+
     def run_process(
         self, command: str | list[str], /, *args, exit_on_decline: bool = True, log: bool = True, **kwargs
     ) -> subprocess.CompletedProcess | None:
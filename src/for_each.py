@@ -1,13 +1,17 @@
 from argparse import ArgumentParser, Namespace
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from convoy import Convoy
 
+import shlex
+import shutil
+
 
 def parse_arguments() -> Namespace:
     desc = """This python scripts executes multiple commands from different
     working directories. Useful when managing multiple projects and must, for example 'git push' all of them."""
 
-    parser = ArgumentParser(description=desc)
+    parser = ArgumentParser(description=desc, parents=[Convoy.prompt_parser()])
     parser.add_argument(
         "-c",
         "--cmds",
@@ -25,20 +29,6 @@ def parse_arguments() -> Namespace:
         type=Path,
         help="The directories to execute the command in.",
     )
-    parser.add_argument(
-        "-s",
-        "--safe",
-        action="store_true",
-        default=False,
-        help="Prompt before executing commands. This setting cannot be used with the '-y' flag.",
-    )
-    parser.add_argument(
-        "-y",
-        "--yes",
-        action="store_true",
-        default=False,
-        help="Skip all prompts and proceed with everything.",
-    )
     parser.add_argument(
         "-r",
         "--recursive",
@@ -72,6 +62,13 @@ def parse_arguments() -> Namespace:
         default=False,
         help="Instead of trying to match directories and commands 1-to-1, apply all commands to all directories.",
     )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="The maximum number of directories to process concurrently. Commands for the same directory always run in order. The '-s' flag forces a single job. Defaults to 1.",
+    )
 
     return parser.parse_args()
 
@@ -106,23 +103,51 @@ if not args.nested:
 
 wdir = Path.cwd()
 
+SHELL_CHARACTERS = frozenset(";&|<>$`*?~(){}[]'\"\\#!=%\n")
+
+
+# Plain program invocations skip the extra shell process that shell=True spawns for every directory
+def split_command(cmd: str, /) -> list[str] | None:
+    if Convoy.is_windows or not SHELL_CHARACTERS.isdisjoint(cmd):
+        return None
+    argv = shlex.split(cmd)
+    if not argv or "/" in argv[0] or shutil.which(argv[0]) is None:
+        return None
+    return argv
+
 
-def process_directory(path: Path, cmd: str, /) -> None:
-    if not path.exists():
+argvs = {cmd: split_command(cmd) for cmd in cmds}
+
+
+# Returns the command that failed, if any. Later commands for the same directory are not run
+def process_directory(task: tuple[Path, list[str]], /) -> str | None:
+    path, dcmds = task
+    # Without --skip-if-missing, resolve_paths has already checked that every directory exists
+    if args.skip_if_missing and not path.exists():
         Convoy.warning(f"Skipping missing directory: <underline>{path}</underline>")
-        return
+        return None
 
-    Convoy.verbose(f"Executing command <bold>{cmd}</bold> at <underline>{path}</underline>.")
-    if not Convoy.run_process_success(cmd, cwd=path, shell=True, log=False):
+    for cmd in dcmds:
+        Convoy.verbose(f"Executing command <bold>{cmd}</bold> at <underline>{path}</underline>.")
+        argv = argvs[cmd]
+        if Convoy.run_process_success(cmd if argv is None else argv, cwd=path, shell=argv is None, log=False):
+            continue
         if not args.ignore_cmd_errors:
-            Convoy.exit_error(f"Failed to execute command <bold>{cmd}</bold> at <underline>{path}</underline>.")
+            return cmd
         Convoy.warning(f"Command <bold>{cmd}</bold> failed at <underline>{path}</underline>.")
+    return None
 
 
-if not args.nested:
-    for dir, cmd in zip(directories, cmds):
-        process_directory(dir, cmd)
+if args.nested:
+    tasks = [(dir, cmds) for dir in directories]
 else:
-    for dir in directories:
-        for cmd in cmds:
-            process_directory(dir, cmd)
+    tasks = [(dir, [cmd]) for dir, cmd in zip(directories, cmds)]
+
+# Prompts cannot be answered concurrently, so safe mode processes one directory at a time
+jobs = 1 if args.safe else max(args.jobs, 1)
+with ThreadPoolExecutor(max_workers=jobs) as executor:
+    results = map(process_directory, tasks) if jobs == 1 else executor.map(process_directory, tasks)
+    for (dir, _), failed in zip(tasks, results):
+        if failed is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+            Convoy.exit_error(f"Failed to execute command <bold>{failed}</bold> at <underline>{dir}</underline>.")
@@ -1,14 +1,17 @@
 from argparse import ArgumentParser, Namespace
 from pathlib import Path
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
 from convoy import Convoy
 
 import subprocess
 import re
+import stat
 
 
 def parse_arguments() -> Namespace:
     desc = """This python script has different git utilities."""
-    parser = ArgumentParser(description=desc)
+    parser = ArgumentParser(description=desc, parents=[Convoy.prompt_parser()])
 
     parser.add_argument(
         "-p",
@@ -49,20 +52,6 @@ def parse_arguments() -> Namespace:
     parser.add_argument(
         "-r", "--remote", action="store_true", default=False, help="Apply changes on remote as well, when applicable."
     )
-    parser.add_argument(
-        "-s",
-        "--safe",
-        action="store_true",
-        default=False,
-        help="Prompt before executing commands. This setting cannot be used with the '-y' flag.",
-    )
-    parser.add_argument(
-        "-y",
-        "--yes",
-        action="store_true",
-        default=False,
-        help="Skip all prompts and proceed with everything.",
-    )
 
     return parser.parse_args()
 
@@ -86,11 +75,9 @@ def get_branches() -> list[str]:
     )
     if not branches.returncode == 0:
         Convoy.exit_error("Failed to retrieve git branches")
-    return [
-        b.lstrip("* ")
-        for b in branches.stdout.split("\n")
-        if b != "" and b.lstrip("* ") not in args.protected_branches
-    ]
+    protected = frozenset(args.protected_branches)
+    names = (b.lstrip("* ") for b in branches.stdout.splitlines() if b)
+    return [b for b in names if b not in protected]
 
 
 def get_merged_branches(target: str = "main", /) -> list[str]:
@@ -100,16 +87,17 @@ def get_merged_branches(target: str = "main", /) -> list[str]:
     )
     if not branches.returncode == 0:
         Convoy.exit_error("Failed to retrieve git branches")
-    return [b.lstrip("* ") for b in branches.stdout.split("\n") if b != ""]
+    return [b.lstrip("* ") for b in branches.stdout.splitlines() if b]
 
 
 if args.remove_branches is not None:
     patterns: list[str] = args.remove_branches
     if not patterns:
         patterns = [".*"]
+    compiled = [re.compile(pat) for pat in patterns]
 
     branches = get_branches()
-    merged = get_merged_branches()
+    merged = set(get_merged_branches())
 
     def check_merged(branch: str, /) -> bool:
         if branch in merged:
@@ -119,7 +107,7 @@ if args.remove_branches is not None:
 
     for b in branches:
         if (
-            any(re.search(pat, b) for pat in patterns)
+            any(pat.search(b) for pat in compiled)
             and check_merged(b)
             and Convoy.run_process_success(["git", "branch", "-D", b], cwd=cwd)
             and args.remote
@@ -134,25 +122,31 @@ if not projects:
 
 def modify_cmake(cmake: Path, old_tag: str, new_tag: str, parent_tag: str | None, /) -> bool:
 
-    froze = parent_tag is not None
-    if not cmake.is_file():
+    try:
+        info = cmake.stat()
+    except OSError:
+        info = None
+    if info is None or not stat.S_ISREG(info.st_mode):
         Convoy.warning(f"The cmake path <underline>{cmake}</underline> is not a file or does not exist.")
         return False
 
-    with open(cmake, "r") as f:
-        content = f.read()
-        froze = "GIT_TAG main" in content
-
-    if froze:
-        content = content.replace("GIT_TAG main", f"GIT_TAG {parent_tag}")
-        Convoy.log(f"Modified <underline>{cmake}</underline> to freeze dependency to <bold>{parent_tag}</bold>.")
-    else:
-        Convoy.warning(f"A main branch reference was not found in <underline>{cmake}</underline>.")
-
-    macro = rf"VERSION=\"{old_tag}" in content
-
+    main_ref = "GIT_TAG main"
+    macro_ref = rf"VERSION=\"{old_tag}"
+    # A file shorter than both references cannot contain either, so it is not worth reading
+    content = cmake.read_text(encoding="utf-8") if info.st_size >= min(len(main_ref), len(macro_ref)) else ""
+
+    froze = 0
+    if parent_tag is not None:
+        froze = content.count(main_ref)
+        content = content.replace(main_ref, f"GIT_TAG {parent_tag}")
+        if froze:
+            Convoy.log(f"Modified <underline>{cmake}</underline> to freeze dependency to <bold>{parent_tag}</bold>.")
+        else:
+            Convoy.warning(f"A main branch reference was not found in <underline>{cmake}</underline>.")
+
+    macro = content.count(macro_ref)
+    content = content.replace(macro_ref, rf"VERSION=\"{new_tag}")
     if macro:
-        content = content.replace(rf"VERSION=\"{old_tag}", rf"VERSION=\"{new_tag}")
         Convoy.log(f"Modified <underline>{cmake}</underline> to update version macro.")
     else:
         Convoy.warning(f"Version macro with current tag <bold>{old_tag}</bold> not found.")
@@ -160,8 +154,7 @@ def modify_cmake(cmake: Path, old_tag: str, new_tag: str, parent_tag: str | None
     if not froze and not macro:
         return False
 
-    with open(cmake, "w") as f:
-        f.write(content)
+    cmake.write_text(content, encoding="utf-8")
 
     if not Convoy.run_process_success(["git", "add", cmake.name], cwd=cmake.parent) or not Convoy.run_process_success(
         [
@@ -178,18 +171,16 @@ def modify_cmake(cmake: Path, old_tag: str, new_tag: str, parent_tag: str | None
     ):
         Convoy.exit_error(f"Failed to run git commands")
 
-    return froze
+    return froze > 0
 
 
 def revert_cmake(cmake: Path, parent_tag: str, /) -> None:
     Convoy.log(f"Unfreezing at <bold>{cmake}</bold>.")
-    with open(cmake.resolve(), "r") as f:
-        content = f.read()
+    content = cmake.read_text(encoding="utf-8")
 
     content = content.replace(f"GIT_TAG {parent_tag}", "GIT_TAG main")
     Convoy.log(f"Modified <underline>{cmake}</underline> to unfreeze dependency from <bold>{parent_tag}</bold>.")
-    with open(cmake, "w") as f:
-        f.write(content)
+    cmake.write_text(content, encoding="utf-8")
 
     if not Convoy.run_process_success(["git", "add", cmake.name], cwd=cmake.parent) or not Convoy.run_process_success(
         ["git", "commit", "-m", f"chore: Unfreeze dependency from {parent_tag}"], cwd=cmake.parent
@@ -197,8 +188,21 @@ def revert_cmake(cmake: Path, parent_tag: str, /) -> None:
         Convoy.exit_error(f"Failed to run git commands")
 
 
+TAG_PATTERN = re.compile(r"v?(\d+)\.(\d+)\.(\d+)")
+
+
+# Tags are parsed once even when both biggest_tag and increase_tag see them
+@lru_cache(maxsize=None)
+def parse_tag(tag: str, /) -> tuple[int, int, int]:
+    match = TAG_PATTERN.fullmatch(tag)
+    if match is None:
+        Convoy.exit_error(f"The tag <bold>{tag}</bold> does not follow the <bold>vX.Y.Z</bold> format.")
+    major, minor, patch = match.groups()
+    return int(major), int(minor), int(patch)
+
+
 def increase_tag(tag: str, level: str, /) -> str:
-    numbers = [int(n) for n in tag.strip("v").split(".")]
+    numbers = parse_tag(tag)
     if level == "major":
         return f"v{numbers[0] + 1}.0.0"
     if level == "minor":
@@ -209,69 +213,80 @@ def increase_tag(tag: str, level: str, /) -> str:
 def biggest_tag(tags: str | list[str], /) -> str:
     if isinstance(tags, str):
         tags = tags.split("\n")
+    return max((t for t in tags if t), key=parse_tag)
+
+
+def collect_tag_state(project: Path, /) -> tuple[list[str], list[str], str]:
+    # A single log call yields both the tags decorating HEAD and its commit message
+    result = Convoy.run_process(
+        ["git", "log", "-1", "--format=%D%x00%B"],
+        exit_on_decline=True,
+        text=True,
+        capture_output=True,
+        cwd=project,
+    )
+    decorations, message = result.stdout.split("\0", 1) if result is not None and result.returncode == 0 else ("", "")
+    head_tags = [d.removeprefix("tag: ") for d in decorations.strip().split(", ") if d.startswith("tag: ")]
+
+    result = Convoy.run_process(["git", "tag"], exit_on_decline=True, text=True, capture_output=True, cwd=project)
+    if result is None:
+        Convoy.exit_error("Failed to acquire tags.")
 
-    map = {}
-    for t in tags:
-        if not t:
+    return head_tags, [t for t in result.stdout.split("\n") if t], message
+
+
+# Found by walking up the filesystem instead of asking git, which would cost one more process per project
+def git_common_dir(project: Path, /) -> Path:
+    for directory in (project, *project.parents):
+        dotgit = directory / ".git"
+        if dotgit.is_dir():
+            return dotgit.resolve()
+        if not dotgit.is_file():
             continue
 
-        numbers = [int(n) for n in t.strip("v").split(".")]
-        score = numbers[0] * 1000000 + numbers[1] * 1000 + numbers[2]
-        map[score] = t
+        # Worktrees point to their own git directory, which in turn points to the shared one holding the tags
+        gitdir = (directory / dotgit.read_text(encoding="utf-8").removeprefix("gitdir:").strip()).resolve()
+        commondir = gitdir / "commondir"
+        if commondir.is_file():
+            return (gitdir / commondir.read_text(encoding="utf-8").strip()).resolve()
+        return gitdir
+    return project
+
 
-    scores = sorted(map.keys())
-    return map[scores[-1]]
+def prefetch_tag_state(project: Path, /) -> tuple[Path, tuple[list[str], list[str], str]]:
+    return git_common_dir(project), collect_tag_state(project)
 
 
 def add_tag(
-    project: Path, level: str, parent_tag: str | None = None, parent_modified: bool = False, /
+    project: Path,
+    level: str,
+    state: tuple[list[str], list[str], str],
+    parent_tag: str | None = None,
+    parent_modified: bool = False,
+    /,
 ) -> tuple[str, bool]:
     Convoy.log(f"Adding tag to project at <underline>{project}</underline>.")
-    if not project.is_dir():
-        Convoy.exit_error(f"The project <underline>{project}</underline> must exist and be a directory.")
+    head_tags, tags, message = state
+    if not parent_modified and head_tags:
+        tag = biggest_tag(head_tags)
+        Convoy.log(f"Found an already existing tag in the current commit: <bold>{tag}</bold>.")
+        return tag, False
 
-    if not parent_modified:
-        result = Convoy.run_process(
-            ["git", "describe", "--tags", "--exact-match"],
-            exit_on_decline=True,
-            text=True,
-            capture_output=True,
-            cwd=project,
-        )
-
-        if result is not None and result.returncode == 0:
-            tag = biggest_tag(result.stdout)
-            Convoy.log(f"Found an already existing tag in the current commit: <bold>{tag}</bold>.")
-            return tag, False
-
-    result = Convoy.run_process(["git", "tag"], exit_on_decline=True, text=True, capture_output=True, cwd=project)
-    if result is None:
-        Convoy.exit_error("Failed to acquire tags.")
-
-    tags: list[str] = [t for t in result.stdout.split("\n") if t]
     Convoy.log(f"Found tags: <bold>{', '.join(tags)}</bold>." if tags else "Found no tags.")
 
     old_tag = biggest_tag(tags) if tags else "v0.1.0"
 
     Convoy.log(f"Latest tag: <bold>{old_tag}</bold>.")
 
-    if not parent_modified:
-        result = Convoy.run_process(
-            ["git", "log", "-1", "--pretty=%B"],
-            exit_on_decline=True,
-            text=True,
-            capture_output=True,
-            cwd=project,
-        )
-        if result is not None and "Unfreeze" in result.stdout:
-            Convoy.log(f"Found an already existing compatible tag: <bold>{old_tag}</bold>.")
-            return old_tag, False
+    if not parent_modified and "Unfreeze" in message:
+        Convoy.log(f"Found an already existing compatible tag: <bold>{old_tag}</bold>.")
+        return old_tag, False
 
     new_tag = increase_tag(old_tag, level)
     Convoy.log(f"Next tag: <bold>{new_tag}</bold>.")
 
-    cmake = project / project.name / "CMakeLists.txt"
-    froze = modify_cmake(cmake.resolve(), old_tag, new_tag, parent_tag)
+    cmake = (project / project.name / "CMakeLists.txt").resolve()
+    froze = modify_cmake(cmake, old_tag, new_tag, parent_tag)
 
     if not Convoy.run_process_success(["git", "tag", new_tag], cwd=project):
         Convoy.exit_error(f"Failed to create tag <bold>{new_tag}</bold>.")
@@ -297,9 +312,30 @@ if len(levels) == 1:
 if len(levels) != len(projects):
     Convoy.exit_error("If not one, the number of levels must match the number of projects.")
 
-tag, was_mod = add_tag(projects[0].resolve(), levels[0])
+projects = [project.resolve() for project in projects]
+for project in projects:
+    if not project.is_dir():
+        Convoy.exit_error(f"The project <underline>{project}</underline> must exist and be a directory.")
+
+# Reading the tag state does not depend on the parent tag, so it is done for all projects at once
+with ThreadPoolExecutor(max_workers=1 if args.safe else len(projects)) as executor:
+    prefetched = list(executor.map(prefetch_tag_state, projects))
+
+visited: set[Path] = set()
+
+
+def current_state(i: int, /) -> tuple[list[str], list[str], str]:
+    common, state = prefetched[i]
+    # An earlier project sharing the repository may have committed and tagged since the state was read
+    if common in visited:
+        state = collect_tag_state(projects[i])
+    visited.add(common)
+    return state
+
+
+tag, was_mod = add_tag(projects[0], levels[0], current_state(0))
 for i in range(1, len(projects)):
-    tag, was_mod = add_tag(projects[i].resolve(), levels[i], tag, was_mod)
+    tag, was_mod = add_tag(projects[i], levels[i], current_state(i), tag, was_mod)
 
 
 Convoy.exit_ok()
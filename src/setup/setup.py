@@ -37,22 +37,8 @@ def parse_arguments() -> tuple[Namespace, list[str]]:
     for linux operating systems, as I do not possess one to test the script on.
     """
 
-    parser = ArgumentParser(description=desc)
+    parser = ArgumentParser(description=desc, parents=[Convoy.prompt_parser()])
 
-    parser.add_argument(
-        "-s",
-        "--safe",
-        action="store_true",
-        default=False,
-        help="Prompt before executing commands. This setting cannot be used with the '-y' flag.",
-    )
-    parser.add_argument(
-        "-y",
-        "--yes",
-        action="store_true",
-        default=False,
-        help="Skip all prompts and proceed with everything.",
-    )
     if Convoy.is_linux:
         parser.add_argument(
             "--linux-devtools",